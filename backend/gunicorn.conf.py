@@ -0,0 +1,5 @@
+# Picked up automatically by gunicorn from the working directory
+def post_worker_init(worker):
+    """Start ingest workers and the history save hook in each worker once the app is loaded"""
+    import server
+    server.start_background_tasks()
@@ -1,10 +1,19 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 import hypersync
 import asyncio
 import os
 from dotenv import load_dotenv
 import time
+import threading
+import math
+import heapq
+import functools
+import atexit
+import json
+from collections import deque, OrderedDict
+from enum import IntEnum
 from hypersync import TransactionField, BlockField
 
 app = Flask(__name__)
@@ -15,22 +24,157 @@ load_dotenv()
 
 # Constants
 MONAD_HYPERSYNC_URL = "https://monad-testnet.hypersync.xyz"
+MONAD_TESTNET_CHAIN_ID = 10143
 bearer_token = os.environ.get("HYPERSYNC_BEARER_TOKEN")
 
-# Initialize HypersyncClient
-client_config = hypersync.ClientConfig(
-    url=MONAD_HYPERSYNC_URL,
-    bearer_token=bearer_token
-)
+# Chains to ingest as comma-separated "chain_id=hypersync_url" pairs; the first
+# chain is also served by the unprefixed /api/... routes
+HYPERSYNC_CHAINS = os.environ.get("HYPERSYNC_CHAINS", f"{MONAD_TESTNET_CHAIN_ID}={MONAD_HYPERSYNC_URL}")
+# Seconds between background refreshes per chain; 0 keeps refreshing on request instead
+INGEST_POLL_INTERVAL = float(os.environ.get("INGEST_POLL_INTERVAL", 0))
 
-# Cache for storing recent transactions
-transaction_cache = []
-last_block_number = 0
+# Sliding windows (in blocks) for gas price / fee quantiles, e.g. "10,50,200"
+FEE_STATS_WINDOWS = [int(w) for w in os.environ.get("FEE_STATS_WINDOWS", "10,50,200").split(",") if w.strip()]
+FEE_STATS_QUANTILES = [0.1, 0.5, 0.9, 0.99]
 
-# Metrics tracking
-block_cache = []  # Store recent blocks for TPS calculation
-last_metrics_update = 0
-current_metrics = {
+# Long-range metrics history: rollup tiers as (name, bucket width in seconds, buckets kept);
+# the 'block' tier keeps raw per-block points
+METRICS_HISTORY_TIERS = [
+    ('block', None, 1000),
+    ('10s', 10, 360),  # 1 hour
+    ('1m', 60, 1440),  # 1 day
+    ('1h', 3600, 720),  # 30 days
+]
+# Monad testnet writes this path; other chains append their chain ID (see metrics_history_path)
+METRICS_HISTORY_PATH = os.environ.get("METRICS_HISTORY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics_history.json"))
+METRICS_HISTORY_SAVE_INTERVAL = 30  # Seconds between writes of the history file
+METRICS_HISTORY_MAX_POINTS = 1000
+
+# Local 4-byte selector -> function signature database used for calldata classification
+SIGNATURE_DB_PATH = os.environ.get("SIGNATURE_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "signatures.json"))
+SELECTOR_CACHE_SIZE = 4096
+
+# Named HyperSync field-selection profiles, from cheapest to heaviest
+FIELD_PROFILES = {
+    # Block timestamps and per-block transaction counts only
+    'counts': {
+        'transaction': [TransactionField.BLOCK_NUMBER],
+        'block': [BlockField.NUMBER, BlockField.TIMESTAMP],
+    },
+    # Everything the cache, metrics and live views use (calldata is only read for classification)
+    'standard': {
+        'transaction': [
+            TransactionField.HASH,
+            TransactionField.FROM,
+            TransactionField.TO,
+            TransactionField.VALUE,
+            TransactionField.BLOCK_NUMBER,
+            TransactionField.TRANSACTION_INDEX,
+            TransactionField.GAS_USED,
+            TransactionField.GAS_PRICE,
+            TransactionField.STATUS,
+            TransactionField.INPUT,
+            TransactionField.KIND,  # Transaction type
+            TransactionField.NONCE,
+        ],
+        'block': [
+            BlockField.NUMBER,
+            BlockField.TIMESTAMP,
+            BlockField.HASH,
+            BlockField.MINER,
+            BlockField.GAS_USED,
+            BlockField.GAS_LIMIT,
+            BlockField.BASE_FEE_PER_GAS,
+        ],
+    },
+    # Heavy columns, fetched on demand for individual transactions
+    'full': {
+        'transaction': [
+            TransactionField.HASH,
+            TransactionField.FROM,
+            TransactionField.TO,
+            TransactionField.VALUE,
+            TransactionField.BLOCK_NUMBER,
+            TransactionField.TRANSACTION_INDEX,
+            TransactionField.GAS,
+            TransactionField.GAS_USED,
+            TransactionField.GAS_PRICE,
+            TransactionField.EFFECTIVE_GAS_PRICE,
+            TransactionField.MAX_FEE_PER_GAS,
+            TransactionField.MAX_PRIORITY_FEE_PER_GAS,
+            TransactionField.STATUS,
+            TransactionField.INPUT,
+            TransactionField.KIND,
+            TransactionField.NONCE,
+            TransactionField.CUMULATIVE_GAS_USED,
+            TransactionField.CONTRACT_ADDRESS,
+        ],
+        'block': [
+            BlockField.NUMBER,
+            BlockField.TIMESTAMP,
+            BlockField.HASH,
+            BlockField.PARENT_HASH,
+            BlockField.MINER,
+            BlockField.GAS_USED,
+            BlockField.GAS_LIMIT,
+            BlockField.BASE_FEE_PER_GAS,
+            BlockField.DIFFICULTY,
+            BlockField.SIZE,
+        ],
+    },
+}
+
+# Field profile used by each query path
+QUERY_FIELD_PROFILES = {
+    'ingest': os.environ.get("INGEST_FIELD_PROFILE", "standard"),
+    'tps': 'counts',
+    'search': 'standard',
+    'details': 'full',
+}
+for query_path, profile_name in QUERY_FIELD_PROFILES.items():
+    if profile_name not in FIELD_PROFILES:
+        raise ValueError(f"Unknown field profile '{profile_name}' for {query_path}; expected one of {', '.join(FIELD_PROFILES)}")
+# Ingest dedupes on hash, samples on hash and classifies calldata, so leaner profiles can't feed the cache
+INGEST_FIELD_PROFILES = ('standard', 'full')
+if QUERY_FIELD_PROFILES['ingest'] not in INGEST_FIELD_PROFILES:
+    raise ValueError(f"INGEST_FIELD_PROFILE must be one of {', '.join(INGEST_FIELD_PROFILES)}, got '{QUERY_FIELD_PROFILES['ingest']}'")
+TRANSACTION_DETAILS_CACHE_SIZE = 1024
+
+# Sampled live feed: default and maximum target rate in transactions per second
+DEFAULT_SAMPLE_RATE = 20
+MAX_SAMPLE_RATE = 1000
+
+# /api/snapshot: how far back a lagging cursor may catch up, in blocks
+SNAPSHOT_MAX_CATCHUP_BLOCKS = 10
+
+# Admission control: each route class gets its own pool of cost units so heavy
+# searches queue among themselves instead of starving the live endpoints
+ADMISSION_POOLS = {
+    'live': {
+        'capacity': int(os.environ.get("ADMISSION_LIVE_CAPACITY", 16)),
+        'max_queue': int(os.environ.get("ADMISSION_LIVE_QUEUE", 32)),
+        'queue_timeout': float(os.environ.get("ADMISSION_LIVE_TIMEOUT", 5)),
+    },
+    'search': {
+        'capacity': int(os.environ.get("ADMISSION_SEARCH_CAPACITY", 8)),
+        'max_queue': int(os.environ.get("ADMISSION_SEARCH_QUEUE", 8)),
+        'queue_timeout': float(os.environ.get("ADMISSION_SEARCH_TIMEOUT", 10)),
+    },
+}
+SEARCH_COST_BLOCKS = 1000  # One extra cost unit per this many blocks searched
+SEARCH_COST_TRANSACTIONS = 500  # One extra cost unit per this many transactions requested
+MAX_SEARCH_LIMIT = 1000
+# Optional per-client token buckets (cost units per second); 0 disables them
+CLIENT_RATE_LIMIT = float(os.environ.get("CLIENT_RATE_LIMIT", 0))
+CLIENT_BURST = float(os.environ.get("CLIENT_BURST", 20))
+MAX_TRACKED_CLIENTS = 10000
+# Reverse proxies in front of the app (e.g. 1 on Render); their X-Forwarded-For hops are trusted
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", 0))
+if TRUSTED_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+# Initial metrics for every chain
+DEFAULT_METRICS = {
     'tps': 0,
     'tps_10s': 0,
     'tps_30s': 0,
@@ -42,11 +186,649 @@ current_metrics = {
     'avg_block_time': 0,
     'avg_gas_price': 0,  # Average gas price in wei
     'avg_gas_price_gwei': 0,  # Average gas price in gwei
-    'network_activity': 'Low'
+    'network_activity': 'Low',
+    'fee_stats': {}  # Gas price / fee / base fee / utilization quantiles per window
 }
 
-# Initialize the client
-client = hypersync.HypersyncClient(client_config)
+class DDSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch)"""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}  # bucket index -> count
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0
+
+    def add(self, value):
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, other):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+
+    def subtract(self, other):
+        # Bucket counts are additive, so a sketch that was merged in can be removed again
+        for index, count in other.buckets.items():
+            remaining = self.buckets.get(index, 0) - count
+            if remaining > 0:
+                self.buckets[index] = remaining
+            else:
+                self.buckets.pop(index, None)
+        self.zero_count = max(0, self.zero_count - other.zero_count)
+        self.count = max(0, self.count - other.count)
+        self.total -= other.total
+
+    def quantiles(self, qs):
+        """Return estimates for the sorted quantiles in qs using a single pass over the buckets"""
+        if self.count == 0:
+            return [0 for _ in qs]
+        results = []
+        ranks = [q * (self.count - 1) for q in qs]
+        seen = self.zero_count
+        items = iter(sorted(self.buckets.items()))
+        estimate = 0
+        for rank in ranks:
+            if rank < self.zero_count:
+                results.append(0)
+                continue
+            while seen <= rank:
+                index, count = next(items)
+                seen += count
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+            results.append(estimate)
+        return results
+
+class FeeStatsTracker:
+    """Sliding-window gas price, fee, base fee and gas utilization quantiles maintained per block"""
+
+    METRICS = ('gas_price', 'gas_fee', 'base_fee', 'gas_utilization')
+
+    def __init__(self, windows, quantiles, relative_accuracy=0.01):
+        self.windows = sorted(set(w for w in windows if w > 0)) or [50]
+        self.quantiles = sorted(quantiles)
+        self.relative_accuracy = relative_accuracy
+        # Per-block sketches; one extra entry so the block leaving the largest window can be subtracted
+        self.history = deque(maxlen=self.windows[-1] + 1)
+        self.window_sketches = {w: self._new_sketches() for w in self.windows}
+        self.last_block = -1
+        self.latest = {}
+        self.snapshot = {}
+
+    def _new_sketches(self):
+        return {metric: DDSketch(self.relative_accuracy) for metric in self.METRICS}
+
+    def add_block(self, block_number, gas_prices, gas_fees, base_fee, gas_utilization):
+        """Fold one block into every window; blocks at or below the last seen height are ignored.
+        Call refresh() once the batch is folded in to rebuild the served snapshot."""
+        if block_number <= self.last_block:
+            return False
+        self.last_block = block_number
+
+        block_sketches = self._new_sketches()
+        for gas_price in gas_prices:
+            block_sketches['gas_price'].add(gas_price)
+        for gas_fee in gas_fees:
+            block_sketches['gas_fee'].add(gas_fee)
+        block_sketches['base_fee'].add(base_fee)
+        block_sketches['gas_utilization'].add(gas_utilization)
+        self.history.append(block_sketches)
+
+        for window, sketches in self.window_sketches.items():
+            for metric in self.METRICS:
+                sketches[metric].merge(block_sketches[metric])
+            if len(self.history) > window:
+                expired = self.history[-(window + 1)]
+                for metric in self.METRICS:
+                    sketches[metric].subtract(expired[metric])
+
+        self.latest = {'base_fee': base_fee, 'gas_utilization': gas_utilization}
+        return True
+
+    def refresh(self):
+        if self.last_block >= 0:
+            self.snapshot = self._build_snapshot(self.latest)
+
+    def _build_snapshot(self, latest):
+        windows = {}
+        for window, sketches in self.window_sketches.items():
+            window_stats = {}
+            for metric, sketch in sketches.items():
+                estimates = sketch.quantiles(self.quantiles)
+                stats = {f"p{round(q * 100)}": round(v, 2) for q, v in zip(self.quantiles, estimates)}
+                stats['mean'] = round(sketch.total / sketch.count, 2) if sketch.count else 0
+                stats['count'] = sketch.count
+                window_stats[metric] = stats
+            windows[str(window)] = {
+                'blocks': min(window, len(self.history)),
+                **window_stats
+            }
+
+        # Trend: latest block value relative to the mean of the largest window, in percent
+        largest = windows[str(self.windows[-1])]
+        trends = {}
+        for metric, value in latest.items():
+            mean = largest[metric]['mean']
+            trends[metric] = {
+                'latest': round(value, 2),
+                'change_pct': round((value - mean) / mean * 100, 2) if mean else 0
+            }
+
+        return {
+            'latest_block': self.last_block,
+            'relative_accuracy': self.relative_accuracy,
+            'windows': windows,
+            'trends': trends
+        }
+
+class MetricsHistory:
+    """Fixed-size per-block and time-bucketed rollups of block metrics, persisted to a JSON file"""
+
+    def __init__(self, tiers, path=None):
+        self.tiers = tiers
+        self.path = path
+        self.points = {name: deque(maxlen=size) for name, _, size in tiers}
+        self.last_block = -1
+        self.last_timestamp = None
+        self.last_saved = time.time()
+        self.dirty = False  # Set once a block has been folded in since the last save
+        self.lock = threading.Lock()
+
+    def add_block(self, block_number, timestamp, transactions, gas_used, gas_limit, base_fee):
+        """Fold one block into every tier; blocks at or below the last seen height are ignored"""
+        with self.lock:
+            if block_number <= self.last_block:
+                return False
+            block_time = timestamp - self.last_timestamp if self.last_timestamp is not None and self.last_block == block_number - 1 else None
+            self.last_block = block_number
+            self.last_timestamp = timestamp
+            self.dirty = True
+
+            for name, width, _ in self.tiers:
+                points = self.points[name]
+                if width is None:
+                    points.append({
+                        'start': timestamp,
+                        'block': block_number,
+                        'blocks': 1,
+                        'transactions': transactions,
+                        'gas_used': gas_used,
+                        'gas_limit': gas_limit,
+                        'base_fee_sum': base_fee,
+                        'base_fee_max': base_fee,
+                        # A block time of 0 (same-second block) is a real interval; None means a gap
+                        'block_time_sum': block_time if block_time is not None else 0,
+                        'block_time_count': 1 if block_time is not None else 0,
+                    })
+                    continue
+
+                start = timestamp - timestamp % width
+                if not points or points[-1]['start'] < start:
+                    points.append({
+                        'start': start,
+                        'blocks': 0,
+                        'transactions': 0,
+                        'gas_used': 0,
+                        'gas_limit': 0,
+                        'base_fee_sum': 0,
+                        'base_fee_max': 0,
+                        'block_time_sum': 0,
+                        'block_time_count': 0,
+                    })
+                bucket = points[-1]
+                bucket['blocks'] += 1
+                bucket['transactions'] += transactions
+                bucket['gas_used'] += gas_used
+                bucket['gas_limit'] += gas_limit
+                bucket['base_fee_sum'] += base_fee
+                bucket['base_fee_max'] = max(bucket['base_fee_max'], base_fee)
+                if block_time is not None:
+                    bucket['block_time_sum'] += block_time
+                    bucket['block_time_count'] += 1
+            return True
+
+    def choose_tier(self, from_time, to_time, max_points, avg_block_time=1):
+        """Finest tier that has not evicted data inside the range and fits the range into max_points"""
+        span = max(0, to_time - from_time)
+        for name, width, size in self.tiers:
+            points = self.points[name]
+            evicted = len(points) == size and points[0]['start'] > from_time
+            if not evicted and span / (width or avg_block_time) <= max_points:
+                return name
+        return self.tiers[-1][0]
+
+    def query(self, from_time, to_time, tier, avg_block_time=1):
+        width = dict((name, width) for name, width, _ in self.tiers)[tier]
+        with self.lock:
+            # Include buckets that overlap the range, not just those starting inside it
+            buckets = [b for b in self.points[tier] if b['start'] + (width or 1) > from_time and b['start'] <= to_time]
+            last_timestamp = self.last_timestamp
+
+        if width is None:
+            # Single block intervals are often 0s (several blocks per second), so per-block TPS
+            # falls back to the average block time over the range, then the chain average
+            interval_count = sum(b['block_time_count'] for b in buckets)
+            range_block_time = sum(b['block_time_sum'] for b in buckets) / interval_count if interval_count else 0
+            fallback_block_time = range_block_time or avg_block_time or 1
+
+        results = []
+        for bucket in buckets:
+            if width is None:
+                elapsed = bucket['block_time_sum'] or fallback_block_time
+            elif bucket['start'] + width > (last_timestamp or 0):
+                # The newest bucket is still filling up
+                elapsed = max(1, last_timestamp - bucket['start'] + 1)
+            else:
+                elapsed = width
+            results.append({
+                'timestamp': bucket['start'],
+                'block': bucket.get('block'),
+                'blocks': bucket['blocks'],
+                'transactions': bucket['transactions'],
+                'tps': round(bucket['transactions'] / elapsed, 2) if elapsed else 0,
+                'gas_used': bucket['gas_used'],
+                'gas_utilization': round(bucket['gas_used'] / bucket['gas_limit'] * 100, 2) if bucket['gas_limit'] else 0,
+                'base_fee': round(bucket['base_fee_sum'] / bucket['blocks']) if bucket['blocks'] else 0,
+                'base_fee_max': bucket['base_fee_max'],
+                'block_time': round(bucket['block_time_sum'] / bucket['block_time_count'], 3) if bucket['block_time_count'] else None,
+            })
+        return results
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            with self.lock:
+                for name, _, size in self.tiers:
+                    self.points[name] = deque(saved.get('points', {}).get(name, []), maxlen=size)
+                self.last_block = saved.get('last_block', -1)
+                self.last_timestamp = saved.get('last_timestamp')
+            print(f"Loaded metrics history up to block {self.last_block} from {self.path}")
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load metrics history {self.path}: {e}")
+
+    def save(self, force=False):
+        if not self.path or not self.dirty:
+            return
+        if not force and time.time() - self.last_saved < METRICS_HISTORY_SAVE_INTERVAL:
+            return
+        with self.lock:
+            saved = {
+                'last_block': self.last_block,
+                'last_timestamp': self.last_timestamp,
+                'points': {name: list(points) for name, points in self.points.items()}
+            }
+            self.dirty = False
+        try:
+            # Write to a temporary file first so a crash never leaves a truncated history
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(saved, f)
+            os.replace(tmp_path, self.path)
+            self.last_saved = time.time()
+        except OSError as e:
+            self.dirty = True
+            print(f"Warning: Could not save metrics history {self.path}: {e}")
+
+def metrics_history_path(chain_id):
+    """History file for a chain; Monad testnet keeps the unsuffixed path its single-chain history was saved to"""
+    if chain_id == MONAD_TESTNET_CHAIN_ID:
+        return METRICS_HISTORY_PATH
+    root, ext = os.path.splitext(METRICS_HISTORY_PATH)
+    return f"{root}_{chain_id}{ext}"
+
+class ChainState:
+    """Client, caches and metrics engines for one chain; every ingest step and route works on one of these"""
+
+    def __init__(self, chain_id, url):
+        self.chain_id = chain_id
+        self.url = url
+        self.client = hypersync.HypersyncClient(hypersync.ClientConfig(
+            url=url,
+            bearer_token=bearer_token
+        ))
+
+        # Cache for storing recent transactions
+        self.transaction_cache = []
+        self.last_block_number = 0
+        self.cache_version = 0  # Bumped whenever a new head block has been ingested
+        self.cache_lock = threading.Lock()  # Serializes cache refreshes so each head block is fetched once
+
+        # Metrics tracking
+        self.block_cache = []  # Store recent blocks for TPS calculation
+        self.last_metrics_update = 0
+        self.current_metrics = dict(DEFAULT_METRICS)
+        self.fee_stats = FeeStatsTracker(FEE_STATS_WINDOWS, FEE_STATS_QUANTILES)
+        self.metrics_history = MetricsHistory(METRICS_HISTORY_TIERS, metrics_history_path(chain_id))
+        self.metrics_history.load()
+
+        # Transactions, blocks and metrics from one cache version, replaced as a whole on every refresh
+        self.snapshot_cache = {
+            'version': self.cache_version,
+            'transactions': self.transaction_cache,
+            'blocks': self.block_cache,
+            'metrics': self.current_metrics,
+            'latest_block': self.last_block_number
+        }
+        # Heavy per-transaction fields fetched on demand, keyed by transaction hash
+        self.transaction_details_cache = OrderedDict()
+        self.details_lock = threading.Lock()
+
+        self.worker = None  # Background ingest thread when INGEST_POLL_INTERVAL > 0
+
+    def publish(self, transaction_cache, block_cache, metrics, last_block_number):
+        """Swap in a refreshed cache; readers of snapshot_cache see either the old or the new version, never a mix"""
+        self.transaction_cache = transaction_cache
+        self.block_cache = block_cache
+        self.current_metrics = metrics
+        self.last_block_number = last_block_number
+        self.cache_version += 1
+        self.snapshot_cache = {
+            'version': self.cache_version,
+            'transactions': transaction_cache,
+            'blocks': block_cache,
+            'metrics': metrics,
+            'latest_block': max((tx['blockNumber'] for tx in transaction_cache), default=last_block_number)
+        }
+
+def parse_chain_config(value):
+    """Parse "chain_id=url,chain_id=url" into an ordered list of (chain_id, url)"""
+    chain_config = []
+    for entry in value.split(','):
+        if not entry.strip():
+            continue
+        chain_id, _, url = entry.partition('=')
+        if not url.strip():
+            raise ValueError(f"Invalid HYPERSYNC_CHAINS entry '{entry}'; expected chain_id=url")
+        chain_config.append((int(chain_id), url.strip()))
+    if not chain_config:
+        raise ValueError("HYPERSYNC_CHAINS must list at least one chain")
+    return chain_config
+
+# Initialize one HypersyncClient and store per configured chain
+chains = {chain_id: ChainState(chain_id, url) for chain_id, url in parse_chain_config(HYPERSYNC_CHAINS)}
+DEFAULT_CHAIN_ID = next(iter(chains))
+
+def chain_route(rule, **options):
+    """Register a route for the default chain under /api/... and for every chain under /api/chains/<chain_id>/..."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, chain_id=None, **kwargs):
+            chain = chains.get(DEFAULT_CHAIN_ID if chain_id is None else chain_id)
+            if chain is None:
+                return jsonify({
+                    'status': 'error',
+                    'message': f"Unknown chain: {chain_id}"
+                }), 404
+            return view(chain, *args, **kwargs)
+
+        app.route(rule, defaults={'chain_id': None}, **options)(wrapper)
+        app.route(rule.replace('/api/', '/api/chains/<int:chain_id>/', 1), **options)(wrapper)
+        return wrapper
+    return decorator
+
+class TxCategory(IntEnum):
+    """Transaction classification derived from calldata at ingest time"""
+    OTHER = 0
+    TRANSFER = 1
+    ERC20_TRANSFER = 2
+    ERC20_APPROVE = 3
+    SWAP = 4
+    DEPLOY = 5
+
+ERC20_TRANSFER_SELECTORS = {'0xa9059cbb', '0x23b872dd'}  # transfer, transferFrom
+ERC20_APPROVE_SELECTORS = {'0x095ea7b3', '0x39509351', '0xa457c2d7', '0xd505accf'}  # approve, increase/decreaseAllowance, permit
+SWAP_METHOD_PREFIXES = ('swap', 'exactinput', 'exactoutput')
+
+class SelectorTable:
+    """Selector -> (method name, category) lookups backed by a local signature file, with an LRU in front"""
+
+    def __init__(self, path, max_size=SELECTOR_CACHE_SIZE):
+        self.max_size = max_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()  # Request threads and ingest workers share the LRU
+        self.signatures = {}
+        try:
+            with open(path) as f:
+                self.signatures = {selector.lower(): signature for selector, signature in json.load(f).items()}
+            print(f"Loaded {len(self.signatures)} function signatures from {path}")
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not load signature database {path}: {e}")
+
+    def lookup(self, selector):
+        with self.lock:
+            entry = self.cache.get(selector)
+            if entry is not None:
+                self.cache.move_to_end(selector)
+                return entry
+
+        signature = self.signatures.get(selector)
+        method = signature.split('(', 1)[0] if signature else None
+        if selector in ERC20_TRANSFER_SELECTORS:
+            category = TxCategory.ERC20_TRANSFER
+        elif selector in ERC20_APPROVE_SELECTORS:
+            category = TxCategory.ERC20_APPROVE
+        elif method and method.lower().startswith(SWAP_METHOD_PREFIXES):
+            category = TxCategory.SWAP
+        else:
+            category = TxCategory.OTHER
+
+        # Unknown selectors are cached too so repeated misses stay cheap
+        entry = (method, category)
+        with self.lock:
+            self.cache[selector] = entry
+            if len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+        return entry
+
+selector_table = SelectorTable(SIGNATURE_DB_PATH)
+
+def classify_calldata(to_address, input_data):
+    """Return (selector, method, category, input size in bytes) for a transaction's calldata"""
+    input_data = input_data or '0x'
+    input_size = max(0, (len(input_data) - 2) // 2)
+    if not to_address:
+        return None, None, TxCategory.DEPLOY, input_size
+    if input_size < 4:
+        return None, None, TxCategory.TRANSFER if input_size == 0 else TxCategory.OTHER, input_size
+    selector = input_data[:10].lower()
+    method, category = selector_table.lookup(selector)
+    return selector, method, category, input_size
+
+def parse_category_filter(value):
+    """Parse a comma-separated list of category names or ids into a set of ints (None means no filter)"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (list, tuple)):
+        parts = value
+    else:
+        parts = str(value).split(',')
+    categories = set()
+    for part in parts:
+        part = str(part).strip()
+        if part.isdigit():
+            categories.add(int(TxCategory(int(part))))
+        else:
+            categories.add(int(TxCategory[part.upper()]))
+    return categories
+
+def build_field_selection(query_path, include_blocks=True):
+    """Build the HyperSync field selection for a query path from its configured profile"""
+    profile = FIELD_PROFILES[QUERY_FIELD_PROFILES[query_path]]
+    return hypersync.FieldSelection(
+        transaction=list(profile['transaction']),
+        block=list(profile['block']) if include_blocks else None
+    )
+
+def parse_quantity(value):
+    # HyperSync returns quantities as hex strings; fields outside the selected profile come back as None
+    return int(value, 16) if isinstance(value, str) else (value or 0)
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code, message, retry_after):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class AdmissionPool:
+    """Weighted concurrency limit with a bounded wait queue and per-request deadlines"""
+
+    def __init__(self, name, capacity, max_queue, queue_timeout):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.condition = threading.Condition()
+        self.in_use = 0
+        self.waiting = 0
+        self.avg_duration = 1.0  # EWMA of request duration in seconds, used for Retry-After
+
+    def retry_after(self):
+        backlog = (self.waiting + 1) / self.capacity
+        return max(1, math.ceil(self.avg_duration * backlog))
+
+    def acquire(self, cost):
+        # A request larger than the pool takes the whole pool rather than never running
+        cost = max(1, min(cost, self.capacity))
+        with self.condition:
+            if self.waiting == 0 and self.in_use + cost <= self.capacity:
+                self.in_use += cost
+                return cost
+            if self.waiting >= self.max_queue:
+                raise AdmissionRejected(503, f"{self.name} endpoints are saturated", self.retry_after())
+
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.in_use + cost > self.capacity:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise AdmissionRejected(503, f"Timed out waiting for {self.name} capacity", self.retry_after())
+                    self.condition.wait(remaining)
+                self.in_use += cost
+                return cost
+            finally:
+                self.waiting -= 1
+
+    def release(self, cost, duration):
+        with self.condition:
+            self.in_use -= cost
+            self.avg_duration = self.avg_duration * 0.8 + duration * 0.2
+            self.condition.notify_all()
+
+class ClientRateLimiter:
+    """Per-client token buckets; each request spends its estimated cost"""
+
+    def __init__(self, rate, burst, max_clients=MAX_TRACKED_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()  # client -> (tokens, last refill time)
+        self.lock = threading.Lock()
+
+    def consume(self, client_id, cost):
+        # Like AdmissionPool.acquire, a request larger than the bucket costs the whole bucket rather than never passing
+        cost = max(1, min(cost, self.burst))
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.pop(client_id, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self.buckets[client_id] = (tokens, now)
+            if len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+        if not allowed:
+            retry_after = max(1, math.ceil((cost - tokens) / self.rate))
+            raise AdmissionRejected(429, "Rate limit exceeded", retry_after)
+        return cost
+
+    def refund(self, client_id, cost):
+        """Give back tokens spent by a request that was then shed before running"""
+        with self.lock:
+            if client_id in self.buckets:
+                tokens, last = self.buckets[client_id]
+                self.buckets[client_id] = (min(self.burst, tokens + cost), last)
+
+admission_pools = {name: AdmissionPool(name, **config) for name, config in ADMISSION_POOLS.items()}
+client_rate_limiter = ClientRateLimiter(CLIENT_RATE_LIMIT, CLIENT_BURST) if CLIENT_RATE_LIMIT > 0 else None
+
+def get_client_id():
+    # Never read X-Forwarded-For directly: clients control it. ProxyFix sets remote_addr
+    # from the trusted proxy hops when TRUSTED_PROXY_HOPS is configured
+    return request.remote_addr or 'unknown'
+
+def admission(pool_name, cost=None):
+    """Route decorator (applied below chain_route) that admits requests into a pool,
+    estimating their cost with cost(chain) if given"""
+    pool = admission_pools[pool_name]
+
+    def decorator(route):
+        @functools.wraps(route)
+        def wrapper(chain, *args, **kwargs):
+            try:
+                request_cost = cost(chain) if cost else 1
+            except (TypeError, ValueError) as e:
+                return jsonify({
+                    'status': 'error',
+                    'message': f"Invalid parameter: {e}"
+                }), 400
+
+            client_id = get_client_id()
+            charged = 0
+            try:
+                if client_rate_limiter is not None:
+                    charged = client_rate_limiter.consume(client_id, request_cost)
+                acquired = pool.acquire(request_cost)
+            except AdmissionRejected as e:
+                # A request shed by the pool never ran, so it doesn't count against the client
+                if charged:
+                    client_rate_limiter.refund(client_id, charged)
+                response = jsonify({
+                    'status': 'error',
+                    'message': str(e),
+                    'retry_after': e.retry_after
+                })
+                response.status_code = e.status_code
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+
+            started = time.monotonic()
+            try:
+                return route(chain, *args, **kwargs)
+            finally:
+                pool.release(acquired, time.monotonic() - started)
+        return wrapper
+    return decorator
+
+def parse_search_range(data, head_block):
+    """Block range and result limit for /api/search/advanced, with the route's defaults"""
+    from_block = int(data.get('fromBlock', head_block - 100))
+    to_block = int(data.get('toBlock', head_block + 1))
+    limit = max(1, min(int(data.get('limit', MAX_SEARCH_LIMIT)), MAX_SEARCH_LIMIT))
+    return from_block, to_block, limit
+
+def estimate_search_cost(chain):
+    # Price the same range the route will search, including defaults relative to the chain head
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        raise ValueError("request body must be a JSON object")
+    from_block, to_block, limit = parse_search_range(data, chain.last_block_number)
+    span = max(0, to_block - from_block)
+    return 1 + span // SEARCH_COST_BLOCKS + limit // SEARCH_COST_TRANSACTIONS
 
 # Helper function to run async code in a synchronous context
 def run_async(coroutine):
@@ -68,9 +850,8 @@ def run_async(coroutine):
 
 # In newer Flask versions, we need to initialize as part of app context
 def initialize_client():
-    global client
     try:
-        print("HypersyncClient initialized.")
+        print(f"HypersyncClients initialized for chains: {', '.join(str(chain_id) for chain_id in chains)}")
         
         # Don't populate initial cache automatically to avoid async issues
         # run_async(update_transaction_cache())
@@ -84,11 +865,36 @@ def init():
     initialize_client()
     return jsonify({"status": "success", "message": "Client initialized"})
 
-async def update_transaction_cache():
-    global transaction_cache, last_block_number, block_cache
+@app.route('/api/chains', methods=['GET'])
+def get_chains():
+    """List configured chains; each one is served under /api/chains/<chain_id>/..."""
+    return jsonify({
+        'status': 'success',
+        'data': {
+            'default_chain': DEFAULT_CHAIN_ID,
+            'chains': [
+                {
+                    'chain_id': chain.chain_id,
+                    'url': chain.url,
+                    'latest_block': chain.last_block_number,
+                    'cache_version': chain.cache_version,
+                    'cached_transactions': len(chain.transaction_cache),
+                    'cached_blocks': len(chain.block_cache),
+                    'background_ingest': chain.worker is not None
+                }
+                for chain in chains.values()
+            ]
+        }
+    })
+
+async def update_transaction_cache(chain):
     
     try:
-        latest_block_number = await client.get_height()
+        latest_block_number = await chain.client.get_height()
+        
+        # Nothing new to ingest until the head moves
+        if chain.transaction_cache and latest_block_number <= chain.last_block_number:
+            return
         
         # Enhanced query with optimized field selection and advanced features
         # Increase block range to capture more transactions per update
@@ -98,41 +904,13 @@ async def update_transaction_cache():
             to_block=latest_block_number + 1,  # Exclusive end block
             blocks=[{}],  # Include all blocks in range
             transactions=[{}],  # Include all transactions
-            field_selection=hypersync.FieldSelection(
-                transaction=[
-                    TransactionField.HASH,
-                    TransactionField.FROM,
-                    TransactionField.TO,
-                    TransactionField.VALUE,
-                    TransactionField.BLOCK_NUMBER,
-                    TransactionField.TRANSACTION_INDEX,
-                    TransactionField.GAS_USED,
-                    TransactionField.GAS_PRICE,
-                    TransactionField.STATUS,
-                    TransactionField.INPUT,
-                    TransactionField.KIND,  # Transaction type
-                    TransactionField.NONCE,
-                    TransactionField.CUMULATIVE_GAS_USED,
-                ],
-                block=[
-                    BlockField.NUMBER,
-                    BlockField.TIMESTAMP,
-                    BlockField.HASH,
-                    BlockField.PARENT_HASH,
-                    BlockField.MINER,
-                    BlockField.GAS_USED,
-                    BlockField.GAS_LIMIT,
-                    BlockField.BASE_FEE_PER_GAS,
-                    BlockField.DIFFICULTY,
-                    BlockField.SIZE,
-                ]
-            ),
+            field_selection=build_field_selection('ingest'),
             max_num_transactions=2000,  # Increased limit to handle more transactions per block
             max_num_blocks=30  # Increased to match our block range
         )
         
         # Fetch the data
-        res = await client.get(query)
+        res = await chain.client.get(query)
         
         # Process blocks for metrics with enhanced data
         new_blocks = []
@@ -140,11 +918,9 @@ async def update_transaction_cache():
         for block in res.data.blocks:
             block_number = int(block.number, 16) if isinstance(block.number, str) else block.number
             timestamp = int(block.timestamp, 16) if isinstance(block.timestamp, str) else block.timestamp
-            gas_used = int(block.gas_used, 16) if hasattr(block, 'gas_used') and isinstance(block.gas_used, str) else getattr(block, 'gas_used', 0)
-            gas_limit = int(block.gas_limit, 16) if hasattr(block, 'gas_limit') and isinstance(block.gas_limit, str) else getattr(block, 'gas_limit', 0)
-            base_fee = int(block.base_fee_per_gas, 16) if hasattr(block, 'base_fee_per_gas') and isinstance(block.base_fee_per_gas, str) else getattr(block, 'base_fee_per_gas', 0)
-            difficulty = int(block.difficulty, 16) if hasattr(block, 'difficulty') and isinstance(block.difficulty, str) else getattr(block, 'difficulty', 0)
-            size = int(block.size, 16) if hasattr(block, 'size') and isinstance(block.size, str) else getattr(block, 'size', 0)
+            gas_used = parse_quantity(getattr(block, 'gas_used', 0))
+            gas_limit = parse_quantity(getattr(block, 'gas_limit', 0))
+            base_fee = parse_quantity(getattr(block, 'base_fee_per_gas', 0))
             
             # Store timestamp for quick lookup
             block_timestamp_map[block_number] = timestamp
@@ -153,24 +929,21 @@ async def update_transaction_cache():
                 'number': block_number,
                 'timestamp': timestamp,
                 'hash': block.hash,
-                'parent_hash': getattr(block, 'parent_hash', ''),
                 'miner': getattr(block, 'miner', ''),
                 'gas_used': gas_used,
                 'gas_limit': gas_limit,
                 'base_fee_per_gas': base_fee,
-                'difficulty': difficulty,
-                'size': size,
                 'gas_utilization': (gas_used / gas_limit * 100) if gas_limit > 0 else 0,
                 'transaction_count': len([tx for tx in res.data.transactions if 
                     (int(tx.block_number, 16) if isinstance(tx.block_number, str) else tx.block_number) == block_number])
             }
             
             # Add to block cache (keep last 50 blocks for better metrics)
-            if not any(b['number'] == block_number for b in block_cache):
+            if not any(b['number'] == block_number for b in chain.block_cache):
                 new_blocks.append(block_info)
         
-        # Update block cache with new blocks, sorted by block number (newest first)
-        block_cache = sorted(new_blocks + block_cache, key=lambda x: x['number'], reverse=True)[:50]
+        # New block cache with new blocks, sorted by block number (newest first); published with everything else below
+        block_cache = sorted(new_blocks + chain.block_cache, key=lambda x: x['number'], reverse=True)[:50]
         
         # Process transactions with enhanced data
         new_transactions = []
@@ -191,11 +964,11 @@ async def update_transaction_cache():
                     print(f"Warning: Could not find timestamp for block {tx_block_number}, using current time")
             
             # Enhanced transaction data with more fields
-            gas_used = int(tx.gas_used, 16) if hasattr(tx, 'gas_used') and isinstance(tx.gas_used, str) else getattr(tx, 'gas_used', 0)
-            gas_price = int(tx.gas_price, 16) if hasattr(tx, 'gas_price') and isinstance(tx.gas_price, str) else getattr(tx, 'gas_price', 0)
-            value = int(tx.value, 16) if isinstance(tx.value, str) else tx.value
-            nonce = int(tx.nonce, 16) if hasattr(tx, 'nonce') and isinstance(tx.nonce, str) else getattr(tx, 'nonce', 0)
-            cumulative_gas_used = int(tx.cumulative_gas_used, 16) if hasattr(tx, 'cumulative_gas_used') and isinstance(tx.cumulative_gas_used, str) else getattr(tx, 'cumulative_gas_used', 0)
+            gas_used = parse_quantity(getattr(tx, 'gas_used', 0))
+            gas_price = parse_quantity(getattr(tx, 'gas_price', 0))
+            value = parse_quantity(getattr(tx, 'value', 0))
+            nonce = parse_quantity(getattr(tx, 'nonce', 0))
+            selector, method, category, input_size = classify_calldata(tx.to, getattr(tx, 'input', '0x'))
             
             new_transactions.append({
                 'hash': tx.hash,
@@ -208,42 +981,111 @@ async def update_transaction_cache():
                 'gasUsed': gas_used,
                 'gasPrice': gas_price,
                 'nonce': nonce,
-                'cumulativeGasUsed': cumulative_gas_used,
                 'status': getattr(tx, 'status', 1),
-                'input': getattr(tx, 'input', '0x'),
                 'type': getattr(tx, 'kind', 0),
                 'gasFee': gas_used * gas_price,  # Calculate total gas fee
-                'isContract': len(getattr(tx, 'input', '0x')) > 2,  # Simple contract detection
+                # Calldata is classified here and not kept in the cache
+                'selector': selector,
+                'method': method,
+                'category': int(category),
+                'inputSize': input_size,
+                'isContract': input_size > 0,
             })
         
+        # Fold newly seen blocks into the fee quantile sketches (oldest first)
+        txs_by_block = {}
+        for tx in new_transactions:
+            txs_by_block.setdefault(tx['blockNumber'], []).append(tx)
+        for block_info in sorted(new_blocks, key=lambda x: x['number']):
+            block_txs = txs_by_block.get(block_info['number'], [])
+            chain.fee_stats.add_block(
+                block_info['number'],
+                # Zero-priced (system) transactions stay out of the gas price stats, as in the old average
+                [tx['gasPrice'] for tx in block_txs if tx['gasPrice'] > 0],
+                [tx['gasFee'] for tx in block_txs],
+                block_info['base_fee_per_gas'],
+                block_info['gas_utilization']
+            )
+            chain.metrics_history.add_block(
+                block_info['number'],
+                block_info['timestamp'],
+                block_info['transaction_count'],
+                block_info['gas_used'],
+                block_info['gas_limit'],
+                block_info['base_fee_per_gas']
+            )
+        chain.fee_stats.refresh()
+        chain.metrics_history.save()
+        
         # Update transaction cache, keeping only unique transactions
-        existing_hashes = {tx['hash'] for tx in transaction_cache}
+        existing_hashes = {tx['hash'] for tx in chain.transaction_cache}
         unique_new_transactions = [tx for tx in new_transactions if tx['hash'] not in existing_hashes]
         
-        transaction_cache = unique_new_transactions + transaction_cache
-        transaction_cache = transaction_cache[:500]  # Keep last 500 transactions
-        
-        if latest_block_number > last_block_number:
-            last_block_number = latest_block_number
+        transaction_cache = (unique_new_transactions + chain.transaction_cache)[:500]  # Keep last 500 transactions
         
-        # Update metrics with new data
-        calculate_metrics()
+        # Update metrics with new data, then publish blocks, transactions and metrics together
+        metrics = calculate_metrics(chain, block_cache)
+        chain.publish(transaction_cache, block_cache, metrics, max(latest_block_number, chain.last_block_number))
             
     except Exception as e:
-        print(f"Error updating transaction cache: {e}")
+        print(f"[chain {chain.chain_id}] Error updating transaction cache: {e}")
         import traceback
         traceback.print_exc()
 
 # Synchronous wrapper for update_transaction_cache
-def update_cache_sync():
-    run_async(update_transaction_cache())
+def refresh_chain(chain):
+    with chain.cache_lock:
+        run_async(update_transaction_cache(chain))
+
+def update_cache_sync(chain):
+    # With a background worker the cache is already kept fresh; requests never trigger upstream fetches
+    if chain.worker is None:
+        refresh_chain(chain)
+
+def run_ingest_worker(chain, interval):
+    """Refresh one chain's cache on a fixed interval"""
+    while True:
+        started = time.monotonic()
+        try:
+            refresh_chain(chain)
+        except Exception as e:
+            print(f"[chain {chain.chain_id}] Error in ingest worker: {e}")
+        time.sleep(max(0, interval - (time.monotonic() - started)))
+
+def start_ingest_workers(interval=INGEST_POLL_INTERVAL):
+    """Start one daemon ingest thread per chain (no-op when interval is 0)"""
+    if interval <= 0:
+        return
+    for chain in chains.values():
+        if chain.worker is None:
+            chain.worker = threading.Thread(
+                target=run_ingest_worker,
+                args=(chain, interval),
+                name=f"ingest-{chain.chain_id}",
+                daemon=True
+            )
+            chain.worker.start()
+
+def start_background_tasks():
+    """Start ingest workers and save metrics history on exit; called once per serving process"""
+    for chain in chains.values():
+        atexit.register(chain.metrics_history.save, True)
+    start_ingest_workers()
 
-@app.route('/api/transactions', methods=['GET'])
-def get_transactions():
+@chain_route('/api/transactions', methods=['GET'])
+@admission('live')
+def get_transactions(chain):
     from_block = int(request.args.get('fromBlock', 0))
     to_block = request.args.get('toBlock')  # New parameter for block range
     limit = request.args.get('limit')
     get_all_from_block = request.args.get('getAllFromBlock', 'false').lower() == 'true'  # New parameter
+    try:
+        categories = parse_category_filter(request.args.get('category'))
+    except (KeyError, ValueError):
+        return jsonify({
+            'status': 'error',
+            'message': f"Unknown category: {request.args.get('category')}"
+        }), 400
     
     # If no limit provided, default to 10
     # If limit is 'all', return all transactions (with a safety max)
@@ -258,17 +1100,20 @@ def get_transactions():
         limit = min(limit, 1000)
     
     # Update cache before serving
-    update_cache_sync()
+    update_cache_sync(chain)
     
     # Filter transactions by block range
     if to_block is not None:
         to_block = int(to_block)
         filtered_txs = [
-            tx for tx in transaction_cache 
+            tx for tx in chain.transaction_cache 
             if from_block <= tx['blockNumber'] <= to_block
         ]
     else:
-        filtered_txs = [tx for tx in transaction_cache if tx['blockNumber'] >= from_block]
+        filtered_txs = [tx for tx in chain.transaction_cache if tx['blockNumber'] >= from_block]
+    
+    if categories is not None:
+        filtered_txs = [tx for tx in filtered_txs if tx['category'] in categories]
     
     # If getAllFromBlock is true, return all transactions from the specified block
     if get_all_from_block:
@@ -295,24 +1140,26 @@ def get_transactions():
             'query_info': {
                 'fromBlock': from_block,
                 'toBlock': to_block,
-                'getAllFromBlock': get_all_from_block
+                'getAllFromBlock': get_all_from_block,
+                'category': sorted(categories) if categories is not None else None
             }
         }
     })
 
-@app.route('/api/status', methods=['GET'])
-def get_status():
+@chain_route('/api/status', methods=['GET'])
+@admission('live')
+def get_status(chain):
     try:
-        latest_block = run_async(client.get_height())
-        calculate_metrics()  # Update metrics
+        latest_block = run_async(chain.client.get_height())
+        chain.current_metrics = calculate_metrics(chain)  # Update metrics
         
         return jsonify({
             'status': 'success',
             'data': {
                 'connected': True,
                 'latestBlock': latest_block,
-                'cacheSize': len(transaction_cache),
-                'metrics': current_metrics
+                'cacheSize': len(chain.transaction_cache),
+                'metrics': chain.current_metrics
             }
         })
     except Exception as e:
@@ -321,13 +1168,14 @@ def get_status():
             'message': str(e)
         }, 500)
 
-@app.route('/api/latest-transaction', methods=['GET'])
-def get_latest_transaction():
+@chain_route('/api/latest-transaction', methods=['GET'])
+@admission('live')
+def get_latest_transaction(chain):
     """Get the most recent single transaction"""
     # Update cache before serving
-    update_cache_sync()
+    update_cache_sync(chain)
     
-    if not transaction_cache:
+    if not chain.transaction_cache:
         return jsonify({
             'status': 'success',
             'data': {
@@ -336,7 +1184,7 @@ def get_latest_transaction():
         })
     
     # Return the most recent transaction
-    latest_tx = transaction_cache[0]
+    latest_tx = chain.transaction_cache[0]
     
     return jsonify({
         'status': 'success',
@@ -345,12 +1193,13 @@ def get_latest_transaction():
         }
     })
 
-def calculate_metrics():
-    global current_metrics, block_cache, transaction_cache
-    
+def calculate_metrics(chain, block_cache=None):
+    """Compute a fresh metrics dict from the given (default: published) block cache"""
+    if block_cache is None:
+        block_cache = chain.block_cache
     try:
         # Use the new HyperSync-based TPS calculation (now with 100 blocks)
-        tps_data = run_async(calculate_tps_from_hypersync())
+        tps_data = run_async(calculate_tps_from_hypersync(chain))
         tps = tps_data['tps']
         tps_10s = tps_data['tps_10s'] 
         tps_30s = tps_data['tps_30s']
@@ -366,37 +1215,31 @@ def calculate_metrics():
         recent_blocks = [block for block in block_cache if block.get('timestamp', 0) > current_time - 300]  # Last 5 minutes
         blocks_per_minute = len(recent_blocks) / 5 if recent_blocks else 0
         
-        # Calculate average block time with better precision
-        if len(block_cache) >= 2:
-            time_diffs = []
-            for i in range(1, min(len(block_cache), 10)):  # Use last 10 blocks
-                if 'timestamp' in block_cache[i-1] and 'timestamp' in block_cache[i]:
-                    time_diff = block_cache[i-1]['timestamp'] - block_cache[i]['timestamp']
-                    if time_diff > 0:
-                        time_diffs.append(time_diff)
-            
-            avg_block_time = sum(time_diffs) / len(time_diffs) if time_diffs else 0
+        # Average block time over the last 10 blocks; several blocks can share a timestamp,
+        # so divide the span by the block count rather than averaging non-zero diffs
+        recent = [block for block in block_cache[:10] if 'timestamp' in block]
+        if len(recent) >= 2:
+            span = recent[0]['timestamp'] - recent[-1]['timestamp']
+            numbers = recent[0]['number'] - recent[-1]['number']
+            avg_block_time = span / numbers if numbers > 0 else 0
         else:
             avg_block_time = 0
         
         # Get current block height
-        latest_block = run_async(client.get_height())
+        latest_block = run_async(chain.client.get_height())
         
         # Estimate validators (this is a rough estimate since we don't have direct access)
         # In a real scenario, you'd query the network for validator set
         estimated_validators = 100  # Placeholder - Monad testnet typically has around this many
         
-        # Calculate average gas price from recent transactions (use transaction cache)
-        gas_prices = []
-        for tx in transaction_cache[:50]:  # Use recent transactions from cache
-            gas_price = tx.get('gasPrice', 0)
-            if gas_price and gas_price > 0:
-                gas_prices.append(gas_price)
-        
-        avg_gas_price = sum(gas_prices) / len(gas_prices) if gas_prices else 0
+        # Average gas price over the shortest fee stats window (maintained incrementally at ingest)
+        fee_snapshot = chain.fee_stats.snapshot
+        shortest_window = fee_snapshot.get('windows', {}).get(str(chain.fee_stats.windows[0]), {})
+        avg_gas_price = shortest_window.get('gas_price', {}).get('mean', 0)
         avg_gas_price_gwei = avg_gas_price / 1e9 if avg_gas_price > 0 else 0  # Convert wei to gwei
         
-        current_metrics.update({
+        metrics = dict(chain.current_metrics)
+        metrics.update({
             'tps': round(tps, 2),
             'tps_10s': round(tps_10s, 2),
             'tps_30s': round(tps_30s, 2),
@@ -408,32 +1251,35 @@ def calculate_metrics():
             'avg_block_time': round(avg_block_time, 2),
             'avg_gas_price': round(avg_gas_price, 0),  # Gas price in wei
             'avg_gas_price_gwei': round(avg_gas_price_gwei, 2),  # Gas price in gwei
-            'network_activity': 'High' if tps > 5 else 'Medium' if tps > 1 else 'Low'
+            'network_activity': 'High' if tps > 5 else 'Medium' if tps > 1 else 'Low',
+            'fee_stats': fee_snapshot
         })
+        return metrics
         
     except Exception as e:
-        print(f"Error calculating metrics: {e}")
+        print(f"[chain {chain.chain_id}] Error calculating metrics: {e}")
+        return chain.current_metrics
 
-@app.route('/api/metrics', methods=['GET'])
-def get_blockchain_metrics():
+@chain_route('/api/metrics', methods=['GET'])
+@admission('live')
+def get_blockchain_metrics(chain):
     """Get blockchain metrics like TPS, validators, block height"""
     try:
         # Update metrics if they're stale (older than 10 seconds)
         current_time = time.time()
-        global last_metrics_update
         
-        if current_time - last_metrics_update > 10:
-            calculate_metrics()
-            last_metrics_update = current_time
+        if current_time - chain.last_metrics_update > 10:
+            chain.current_metrics = calculate_metrics(chain)
+            chain.last_metrics_update = current_time
         
         return jsonify({
             'status': 'success',
             'data': {
-                'metrics': current_metrics,
+                'metrics': chain.current_metrics,
                 'additional_info': {
-                    'cached_transactions': len(transaction_cache),
-                    'cached_blocks': len(block_cache),
-                    'last_updated': last_metrics_update
+                    'cached_transactions': len(chain.transaction_cache),
+                    'cached_blocks': len(chain.block_cache),
+                    'last_updated': chain.last_metrics_update
                 }
             }
         })
@@ -443,20 +1289,64 @@ def get_blockchain_metrics():
             'message': str(e)
         }), 500
 
-@app.route('/api/transactions/by-address/<address>', methods=['GET'])
-def get_transactions_by_address(address):
+@chain_route('/api/metrics/history', methods=['GET'])
+@admission('live')
+def get_metrics_history(chain):
+    """Get TPS, gas, base fee and block time history from the coarsest tier that fits the range"""
+    try:
+        to_time = int(request.args.get('to', time.time()))
+        from_time = int(request.args.get('from', to_time - 3600))
+        max_points = max(1, min(int(request.args.get('points', METRICS_HISTORY_MAX_POINTS)), METRICS_HISTORY_MAX_POINTS))
+        resolution = request.args.get('resolution', 'auto')
+        
+        tier_names = [name for name, _, _ in METRICS_HISTORY_TIERS]
+        if resolution == 'auto':
+            resolution = chain.metrics_history.choose_tier(from_time, to_time, max_points, chain.current_metrics.get('avg_block_time') or 1)
+        elif resolution not in tier_names:
+            return jsonify({
+                'status': 'error',
+                'message': f"Unknown resolution: {resolution}; expected auto or one of {', '.join(tier_names)}"
+            }), 400
+        
+        points = chain.metrics_history.query(from_time, to_time, resolution, chain.current_metrics.get('avg_block_time') or 1)
+        
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'resolution': resolution,
+                'from': from_time,
+                'to': to_time,
+                'points': points[-max_points:],
+                'returned': min(len(points), max_points),
+                'truncated': len(points) > max_points
+            }
+        })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f"Invalid parameter: {e}"
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@chain_route('/api/transactions/by-address/<address>', methods=['GET'])
+@admission('live')
+def get_transactions_by_address(chain, address):
     """Get transactions filtered by address (as sender or receiver)"""
     try:
         limit = int(request.args.get('limit', 50))
         limit = min(limit, 500)  # Safety limit
         
         # Update cache first
-        update_cache_sync()
+        update_cache_sync(chain)
         
         # Filter transactions by address
         filtered_txs = [
-            tx for tx in transaction_cache 
-            if tx.get('from', '').lower() == address.lower() or tx.get('to', '').lower() == address.lower()
+            tx for tx in chain.transaction_cache 
+            if (tx.get('from') or '').lower() == address.lower() or (tx.get('to') or '').lower() == address.lower()
         ]
         
         # Apply limit
@@ -477,8 +1367,9 @@ def get_transactions_by_address(address):
             'message': str(e)
         }), 500
 
-@app.route('/api/transactions/large-value', methods=['GET'])
-def get_large_value_transactions():
+@chain_route('/api/transactions/large-value', methods=['GET'])
+@admission('live')
+def get_large_value_transactions(chain):
     """Get transactions with value above a threshold"""
     try:
         # Default to 1 MON equivalent (in wei)
@@ -487,11 +1378,11 @@ def get_large_value_transactions():
         limit = min(limit, 100)  # Safety limit
         
         # Update cache first
-        update_cache_sync()
+        update_cache_sync(chain)
         
         # Filter transactions by value
         filtered_txs = [
-            tx for tx in transaction_cache 
+            tx for tx in chain.transaction_cache 
             if int(tx.get('value', 0)) >= min_value
         ]
         
@@ -516,18 +1407,19 @@ def get_large_value_transactions():
             'message': str(e)
         }), 500
 
-@app.route('/api/blocks/recent', methods=['GET'])
-def get_recent_blocks():
+@chain_route('/api/blocks/recent', methods=['GET'])
+@admission('live')
+def get_recent_blocks(chain):
     """Get recent blocks with detailed information"""
     try:
         limit = int(request.args.get('limit', 10))
         limit = min(limit, 50)  # Safety limit
         
         # Update cache first
-        update_cache_sync()
+        update_cache_sync(chain)
         
         # Get recent blocks
-        recent_blocks = block_cache[:limit]
+        recent_blocks = chain.block_cache[:limit]
         
         return jsonify({
             'status': 'success',
@@ -542,7 +1434,7 @@ def get_recent_blocks():
             'message': str(e)
         }), 500
 
-async def get_advanced_transaction_data(from_block, to_block, address_filter=None, min_value=None):
+async def get_advanced_transaction_data(chain, from_block, to_block, address_filter=None, min_value=None, limit=MAX_SEARCH_LIMIT):
     """Advanced query function using HyperSync best practices"""
     try:
         # Build transaction filter based on parameters
@@ -572,51 +1464,46 @@ async def get_advanced_transaction_data(from_block, to_block, address_filter=Non
             from_block=from_block,
             to_block=to_block,
             transactions=transaction_selection,
-            field_selection=hypersync.FieldSelection(
-                transaction=[
-                    TransactionField.HASH,
-                    TransactionField.FROM,
-                    TransactionField.TO,
-                    TransactionField.VALUE,
-                    TransactionField.BLOCK_NUMBER,
-                    TransactionField.TRANSACTION_INDEX,
-                    TransactionField.GAS_USED,
-                    TransactionField.GAS_PRICE,
-                    TransactionField.STATUS,
-                    TransactionField.INPUT,
-                    TransactionField.KIND,
-                    TransactionField.NONCE,
-                ]
-            ),
-            max_num_transactions=1000
+            field_selection=build_field_selection('search', include_blocks=False),
+            max_num_transactions=limit
         )
         
-        res = await client.get(query)
+        res = await chain.client.get(query)
         return res.data.transactions
         
     except Exception as e:
         print(f"Error in advanced query: {e}")
         return []
 
-@app.route('/api/search/advanced', methods=['POST'])
-def advanced_transaction_search():
+@chain_route('/api/search/advanced', methods=['POST'])
+@admission('search', cost=estimate_search_cost)
+def advanced_transaction_search(chain):
     """Advanced transaction search with multiple filters"""
     try:
         data = request.get_json()
         
-        from_block = data.get('fromBlock', last_block_number - 100)
-        to_block = data.get('toBlock', last_block_number + 1)
+        from_block, to_block, limit = parse_search_range(data, chain.last_block_number)
         address_filter = data.get('address')
         min_value = data.get('minValue')
+        try:
+            categories = parse_category_filter(data.get('category'))
+        except (KeyError, ValueError):
+            return jsonify({
+                'status': 'error',
+                'message': f"Unknown category: {data.get('category')}"
+            }), 400
         
         # Run advanced query
         transactions = run_async(get_advanced_transaction_data(
-            from_block, to_block, address_filter, min_value
+            chain, from_block, to_block, address_filter, min_value, limit
         ))
         
         # Process results
         processed_txs = []
         for tx in transactions:
+            selector, method, category, input_size = classify_calldata(tx.to, getattr(tx, 'input', '0x'))
+            if categories is not None and category not in categories:
+                continue
             processed_txs.append({
                 'hash': tx.hash,
                 'from': tx.from_address if hasattr(tx, 'from_address') else tx.from_,
@@ -626,6 +1513,10 @@ def advanced_transaction_search():
                 'gasUsed': int(tx.gas_used, 16) if hasattr(tx, 'gas_used') and isinstance(tx.gas_used, str) else getattr(tx, 'gas_used', 0),
                 'gasPrice': int(tx.gas_price, 16) if hasattr(tx, 'gas_price') and isinstance(tx.gas_price, str) else getattr(tx, 'gas_price', 0),
                 'status': getattr(tx, 'status', 1),
+                'selector': selector,
+                'method': method,
+                'category': int(category),
+                'inputSize': input_size,
             })
         
         return jsonify({
@@ -635,8 +1526,10 @@ def advanced_transaction_search():
                 'query_params': {
                     'fromBlock': from_block,
                     'toBlock': to_block,
+                    'limit': limit,
                     'address': address_filter,
-                    'minValue': min_value
+                    'minValue': min_value,
+                    'category': sorted(categories) if categories is not None else None
                 },
                 'total_results': len(processed_txs)
             }
@@ -648,18 +1541,26 @@ def advanced_transaction_search():
             'message': str(e)
         }), 500
 
-@app.route('/api/transactions/latest', methods=['GET'])
-def get_latest_transactions():
+@chain_route('/api/transactions/latest', methods=['GET'])
+@admission('live')
+def get_latest_transactions(chain):
     """Get all transactions from the latest blocks"""
     try:
         # Parameters
         num_blocks = int(request.args.get('blocks', 3))  # Default to last 3 blocks
         num_blocks = min(num_blocks, 10)  # Safety limit
+        try:
+            categories = parse_category_filter(request.args.get('category'))
+        except (KeyError, ValueError):
+            return jsonify({
+                'status': 'error',
+                'message': f"Unknown category: {request.args.get('category')}"
+            }), 400
         
         # Update cache before serving
-        update_cache_sync()
+        update_cache_sync(chain)
         
-        if not transaction_cache:
+        if not chain.transaction_cache:
             return jsonify({
                 'status': 'success',
                 'data': {
@@ -670,13 +1571,14 @@ def get_latest_transactions():
             })
         
         # Get the latest block number from our cache
-        latest_block = max(tx['blockNumber'] for tx in transaction_cache)
+        latest_block = max(tx['blockNumber'] for tx in chain.transaction_cache)
         from_block = max(0, latest_block - num_blocks + 1)
         
         # Filter transactions from the latest blocks
         latest_txs = [
-            tx for tx in transaction_cache 
+            tx for tx in chain.transaction_cache 
             if tx['blockNumber'] >= from_block
+            and (categories is None or tx['category'] in categories)
         ]
         
         # Sort by block number (newest first), then by transaction index
@@ -703,14 +1605,342 @@ def get_latest_transactions():
             'message': str(e)
         }), 500
 
-async def calculate_tps_from_hypersync():
+def sample_key(tx):
+    # Transaction hashes are uniformly distributed, so ranking by hash gives a
+    # deterministic sample that stays stable across polls of the same block
+    return int(tx['hash'][2:18], 16)
+
+def sample_block_transactions(txs, budget):
+    """Split a block's transactions into a deterministic sample of at most budget and the rest"""
+    if len(txs) <= budget:
+        return list(txs), []
+    sampled = heapq.nsmallest(budget, txs, key=sample_key)
+    sampled_hashes = {tx['hash'] for tx in sampled}
+    rest = [tx for tx in txs if tx['hash'] not in sampled_hashes]
+    return sampled, rest
+
+def summarize_transactions(txs):
+    """Aggregate stats for transactions that are not sent individually"""
+    categories = {}
+    for tx in txs:
+        name = TxCategory(tx.get('category', 0)).name.lower()
+        categories[name] = categories.get(name, 0) + 1
+    return {
+        'count': len(txs),
+        'value': str(sum(int(tx.get('value', 0)) for tx in txs)),
+        'gasUsed': sum(tx.get('gasUsed', 0) for tx in txs),
+        'gasFee': sum(tx.get('gasFee', 0) for tx in txs),
+        'failed': sum(1 for tx in txs if tx.get('status', 1) == 0),
+        'categories': categories
+    }
+
+def sample_transactions_by_block(txs, blocks, target_rate, avg_block_time=0, from_block=None):
+    """Sample txs per block at target_rate tx/s; returns (sampled newest first, rest, per-block stats)"""
+    txs_by_block = {}
+    for tx in txs:
+        txs_by_block.setdefault(tx['blockNumber'], []).append(tx)
+    
+    timestamps = {block['number']: block['timestamp'] for block in blocks}
+    
+    # Totals come from the block cache; the capped transaction cache is only the sample population
+    block_totals = {
+        block['number']: block['transaction_count'] for block in blocks
+        if from_block is not None and block['number'] >= from_block
+    }
+    block_numbers = sorted(set(block_totals) | set(txs_by_block))
+    
+    # Several blocks often share a one-second timestamp, so spread the range's measured span
+    # (whole seconds, inclusive) evenly over its blocks instead of diffing neighbours
+    range_timestamps = [timestamps[number] for number in block_numbers if number in timestamps]
+    if range_timestamps:
+        block_time = (max(range_timestamps) - min(range_timestamps) + 1) / len(block_numbers)
+    else:
+        block_time = float(avg_block_time or 1)
+    
+    sampled_txs = []
+    rest_txs = []
+    block_stats = []
+    allowance = 0.0  # Fractional budget carried from block to block so the range as a whole holds target_rate
+    for block_number in reversed(block_numbers):
+        block_txs = txs_by_block.get(block_number, [])
+        total = max(block_totals.get(block_number, 0), len(block_txs))
+        
+        allowance += target_rate * block_time
+        budget = int(allowance)
+        allowance -= budget
+        sampled, rest = sample_block_transactions(block_txs, budget)
+        sampled_txs.extend(sampled)
+        rest_txs.extend(rest)
+        
+        block_stats.append({
+            'number': block_number,
+            'timestamp': timestamps.get(block_number, block_txs[0]['timestamp'] if block_txs else 0),
+            'block_time': round(block_time, 3),
+            'total_transactions': total,
+            'cached_transactions': len(block_txs),
+            'sampled': len(sampled),
+            'sample_rate': round(len(sampled) / total, 4) if total else 0,
+            'rest': summarize_transactions(rest)
+        })
+    
+    # Sort by block number (newest first), then by transaction index
+    sampled_txs.sort(key=lambda x: (x['blockNumber'], x.get('transactionIndex', 0)), reverse=True)
+    return sampled_txs, rest_txs, block_stats
+
+@chain_route('/api/transactions/sampled', methods=['GET'])
+@admission('live')
+def get_sampled_transactions(chain):
+    """Get a rate-limited, deterministic sample of transactions from the latest blocks"""
+    try:
+        num_blocks = int(request.args.get('blocks', 3))
+        num_blocks = max(1, min(num_blocks, 10))  # Safety limit
+        target_rate = float(request.args.get('rate', DEFAULT_SAMPLE_RATE))
+        target_rate = max(0.1, min(target_rate, MAX_SAMPLE_RATE))
+        
+        # Update cache before serving
+        update_cache_sync(chain)
+        
+        if not chain.transaction_cache:
+            return jsonify({
+                'status': 'success',
+                'data': {
+                    'transactions': [],
+                    'blocks': [],
+                    'target_rate': target_rate,
+                    'latest_block': 0
+                }
+            })
+        
+        latest_block = max(tx['blockNumber'] for tx in chain.transaction_cache)
+        from_block = max(0, latest_block - num_blocks + 1)
+        
+        sampled_txs, rest_txs, blocks = sample_transactions_by_block(
+            [tx for tx in chain.transaction_cache if tx['blockNumber'] >= from_block],
+            chain.block_cache,
+            target_rate,
+            chain.current_metrics.get('avg_block_time'),
+            from_block
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'transactions': sampled_txs,
+                'blocks': blocks,
+                'target_rate': target_rate,
+                'latest_block': latest_block,
+                'from_block': from_block,
+                'total_transactions': sum(block['total_transactions'] for block in blocks),
+                'cached_transactions': len(sampled_txs) + len(rest_txs),
+                'sampled_transactions': len(sampled_txs),
+                'rest': summarize_transactions(rest_txs)
+            }
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f"Invalid parameter: {e}"
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+async def fetch_transaction_details(chain, tx_hash, block_number):
+    """Fetch the full field profile (including calldata) for a single transaction"""
+    query = hypersync.Query(
+        from_block=block_number,
+        to_block=block_number + 1,
+        transactions=[hypersync.TransactionSelection(hash=[tx_hash])],
+        field_selection=build_field_selection('details', include_blocks=False),
+        max_num_transactions=1
+    )
+    res = await chain.client.get(query)
+    for tx in res.data.transactions:
+        if (tx.hash or '').lower() == tx_hash:
+            return tx
+    return None
+
+@chain_route('/api/transactions/<tx_hash>/details', methods=['GET'])
+@admission('search')
+def get_transaction_details(chain, tx_hash):
+    """Get heavy fields (calldata, receipts data) for one transaction, fetched lazily"""
+    try:
+        tx_hash = tx_hash.lower()
+        with chain.details_lock:
+            details = chain.transaction_details_cache.get(tx_hash)
+            if details is not None:
+                chain.transaction_details_cache.move_to_end(tx_hash)
+        if details is not None:
+            return jsonify({'status': 'success', 'data': {'transaction': details}})
+        
+        # The block number bounds the upstream query to a single block
+        block_number = request.args.get('block')
+        if block_number is None:
+            cached_tx = next((tx for tx in chain.transaction_cache if tx['hash'].lower() == tx_hash), None)
+            if cached_tx is None:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Transaction not in cache; pass ?block=<number>'
+                }), 400
+            block_number = cached_tx['blockNumber']
+        block_number = int(block_number)
+        
+        tx = run_async(fetch_transaction_details(chain, tx_hash, block_number))
+        if tx is None:
+            return jsonify({
+                'status': 'error',
+                'message': f"Transaction {tx_hash} not found in block {block_number}"
+            }), 404
+        
+        input_data = tx.input or '0x'
+        selector, method, category, input_size = classify_calldata(tx.to, input_data)
+        details = {
+            'hash': tx.hash,
+            'from': tx.from_,
+            'to': tx.to,
+            'value': str(parse_quantity(tx.value)),
+            'blockNumber': block_number,
+            'transactionIndex': parse_quantity(tx.transaction_index),
+            'gas': parse_quantity(tx.gas),
+            'gasUsed': parse_quantity(tx.gas_used),
+            'gasPrice': parse_quantity(tx.gas_price),
+            'effectiveGasPrice': parse_quantity(tx.effective_gas_price),
+            'maxFeePerGas': parse_quantity(tx.max_fee_per_gas),
+            'maxPriorityFeePerGas': parse_quantity(tx.max_priority_fee_per_gas),
+            'nonce': parse_quantity(tx.nonce),
+            'cumulativeGasUsed': parse_quantity(tx.cumulative_gas_used),
+            'contractAddress': tx.contract_address,
+            'status': tx.status,
+            'type': tx.kind,
+            'input': input_data,
+            'selector': selector,
+            'method': method,
+            'category': int(category),
+            'inputSize': input_size,
+        }
+        
+        with chain.details_lock:
+            chain.transaction_details_cache[tx_hash] = details
+            if len(chain.transaction_details_cache) > TRANSACTION_DETAILS_CACHE_SIZE:
+                chain.transaction_details_cache.popitem(last=False)
+        
+        return jsonify({'status': 'success', 'data': {'transaction': details}})
+        
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f"Invalid parameter: {e}"
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def take_oldest_blocks(txs, limit):
+    """Take whole blocks from the oldest end of newest-first txs, up to limit; returns (txs, last block taken)"""
+    counts = {}
+    for tx in txs:
+        counts[tx['blockNumber']] = counts.get(tx['blockNumber'], 0) + 1
+    taken = 0
+    last_block = min(counts)
+    for block_number in sorted(counts):
+        if taken + counts[block_number] > limit:
+            break
+        taken += counts[block_number]
+        last_block = block_number
+    if taken == 0:
+        # A single block larger than limit: send part of it rather than stall the cursor
+        return [tx for tx in txs if tx['blockNumber'] == last_block][-limit:], last_block
+    return [tx for tx in txs if tx['blockNumber'] <= last_block], last_block
+
+@chain_route('/api/snapshot', methods=['GET'])
+@admission('live')
+def get_snapshot(chain):
+    """Get metrics, recent blocks and transactions newer than a block cursor in one response"""
+    try:
+        since = int(request.args.get('since', 0))  # Last block number the client has seen
+        block_limit = max(0, min(int(request.args.get('blocks', 5)), 50))
+        limit = max(0, min(int(request.args.get('limit', 200)), 1000))
+        rate = request.args.get('rate')  # Optional: sample transactions at this many tx/s
+        target_rate = max(0.1, min(float(rate), MAX_SAMPLE_RATE)) if rate else None
+        
+        # One refresh per head block, shared by every caller
+        update_cache_sync(chain)
+        snapshot = chain.snapshot_cache  # Published as a whole by each refresh, so no lock is needed
+        latest_block = snapshot['latest_block']
+        
+        # New clients and clients that fell far behind start from the most recent blocks
+        if since > 0:
+            from_block = max(since + 1, latest_block - SNAPSHOT_MAX_CATCHUP_BLOCKS + 1)
+        else:
+            from_block = max(0, latest_block - 2)
+        new_txs = [tx for tx in snapshot['transactions'] if tx['blockNumber'] >= from_block]
+        
+        if target_rate is not None:
+            new_txs, rest_txs, block_stats = sample_transactions_by_block(
+                new_txs, snapshot['blocks'], target_rate, snapshot['metrics'].get('avg_block_time'), from_block
+            )
+        else:
+            new_txs = sorted(new_txs, key=lambda x: (x['blockNumber'], x.get('transactionIndex', 0)), reverse=True)
+        
+        # When limit cuts the response short, send whole blocks from the oldest end and stop the
+        # cursor at the last one sent so the next poll picks up the rest
+        cursor = max(latest_block, since)
+        returned_txs = new_txs[:limit]
+        if len(new_txs) > limit > 0:
+            returned_txs, cursor = take_oldest_blocks(new_txs, limit)
+        
+        sampling = None
+        if target_rate is not None:
+            block_stats = [block for block in block_stats if block['number'] <= cursor]
+            sampling = {
+                'target_rate': target_rate,
+                'blocks': block_stats,
+                'total_transactions': sum(block['total_transactions'] for block in block_stats),
+                'rest': summarize_transactions([tx for tx in rest_txs if tx['blockNumber'] <= cursor])
+            }
+        
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'version': snapshot['version'],
+                'cursor': cursor,
+                'metrics': snapshot['metrics'],
+                'blocks': snapshot['blocks'][:block_limit],
+                'transactions': returned_txs,
+                'sampling': sampling,
+                'pagination': {
+                    'fromBlock': from_block,
+                    'totalFound': len(new_txs),
+                    'returned': len(returned_txs),
+                    'hasMore': cursor < max(latest_block, since)
+                }
+            }
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f"Invalid parameter: {e}"
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+async def calculate_tps_from_hypersync(chain):
     """
     Calculate TPS directly from HyperSync using block-based approach
     This is more accurate and efficient than tracking individual transactions
     """
     try:
         # Get current block height
-        latest_block_number = await client.get_height()
+        latest_block_number = await chain.client.get_height()
         
         # Query blocks from the last 100 blocks for TPS calculation
         # This gives us enough data for 10s, 30s, 60s intervals and even longer periods
@@ -721,20 +1951,12 @@ async def calculate_tps_from_hypersync():
             to_block=latest_block_number + 1,
             blocks=[{}],  # Get all blocks
             transactions=[{}],  # Also get transactions to count them per block
-            field_selection=hypersync.FieldSelection(
-                block=[
-                    BlockField.NUMBER,
-                    BlockField.TIMESTAMP,
-                ],
-                transaction=[
-                    TransactionField.BLOCK_NUMBER,
-                ]
-            ),
+            field_selection=build_field_selection('tps'),
             max_num_blocks=blocks_for_tps + 10,
             max_num_transactions=10000  # Increased limit for 100 blocks
         )
         
-        res = await client.get(query)
+        res = await chain.client.get(query)
         current_time = time.time()
         
         # Count transactions per block
@@ -811,7 +2033,7 @@ async def calculate_tps_from_hypersync():
         }
         
     except Exception as e:
-        print(f"Error calculating TPS from HyperSync: {e}")
+        print(f"[chain {chain.chain_id}] Error calculating TPS from HyperSync: {e}")
         import traceback
         traceback.print_exc()
         return {
@@ -832,10 +2054,15 @@ if __name__ == '__main__':
     print("=" * 50)
     
     try:
-        # Initialize the cache on startup
-        print("Initializing transaction cache...")
-        update_cache_sync()
-        print("Cache initialized successfully!")
+        # debug=True runs this block in the reloader's watcher and again in the serving child;
+        # only the child ingests and writes history, so the two never share a history file
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            # Initialize the cache on startup
+            print("Initializing transaction cache...")
+            for chain in chains.values():
+                refresh_chain(chain)
+            print("Cache initialized successfully!")
+            start_background_tasks()
         
         # Start the Flask server
         app.run(host='0.0.0.0', port=3001, debug=True)
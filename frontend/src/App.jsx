@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
 import { Button } from '@/components/ui/button';
@@ -26,6 +26,17 @@ import LiveTransactionsTab from '@/components/tabs/LiveTransactionsTab';
 import VisualizerTab from '@/components/tabs/VisualizerTab';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:3001';
+// Target rate for the server-side sampled live feed; matches the fastest render rate (MIN_DELAY = 50ms)
+const LIVE_FEED_SAMPLE_RATE = 20;
+// Mirrors TxCategory in backend/server.py
+const TX_CATEGORY = {
+  OTHER: 0,
+  TRANSFER: 1,
+  ERC20_TRANSFER: 2,
+  ERC20_APPROVE: 3,
+  SWAP: 4,
+  DEPLOY: 5
+};
 
 function App() {
   const [loading, setLoading] = useState(true);
@@ -46,6 +57,7 @@ function App() {
     network_activity: 'Low'
   });
   const [recentBlocks, setRecentBlocks] = useState([]);
+  const snapshotCursor = useRef(0); // Last block number received from /api/snapshot
 
   // Dynamic Delay Function State & Queue Management
   const [transactionQueue, setTransactionQueue] = useState([]);
@@ -131,17 +143,24 @@ function App() {
     }
   }, [transactionQueue.length, isProcessingQueue, metrics.tps, networkLatency]);
 
-  // Function to fetch all new transactions from recent blocks
-  async function fetchNewTransactions() {
+  // Function to fetch metrics, recent blocks and new transactions in a single request
+  async function fetchSnapshot() {
     try {
-      // Use the new latest transactions endpoint to get all transactions from recent blocks
-      const response = await fetch(`${API_URL}/api/transactions/latest?blocks=3`);
-      if (!response.ok) throw new Error('Failed to fetch transactions');
+      // The cursor makes the server return only transactions from blocks we haven't seen yet
+      const response = await fetch(
+        `${API_URL}/api/snapshot?since=${snapshotCursor.current}&blocks=5&rate=${LIVE_FEED_SAMPLE_RATE}`
+      );
+      if (!response.ok) throw new Error('Failed to fetch snapshot');
 
       const result = await response.json();
 
-      if (result.status === 'success' && result.data && result.data.transactions.length > 0) {
+      if (result.status === 'success' && result.data) {
+        setMetrics(result.data.metrics);
+        setRecentBlocks(result.data.blocks);
+        snapshotCursor.current = result.data.cursor;
+
         const newTransactions = result.data.transactions;
+        if (newTransactions.length === 0) return;
 
         // Add new transactions to the queue for gradual rendering
         setTransactionQueue(prev => {
@@ -166,7 +185,7 @@ function App() {
         });
       }
     } catch (err) {
-      console.error('Error fetching new transactions:', err);
+      console.error('Error fetching snapshot:', err);
       setError(err.message);
     }
   }
@@ -207,52 +226,16 @@ function App() {
     }
   }
 
-  // Function to fetch blockchain metrics
-  async function fetchMetrics() {
-    try {
-      const response = await fetch(`${API_URL}/api/metrics`);
-      if (!response.ok) throw new Error('Failed to fetch metrics');
-
-      const result = await response.json();
-
-      if (result.status === 'success' && result.data) {
-        setMetrics(result.data.metrics);
-      }
-    } catch (err) {
-      console.error('Error fetching metrics:', err);
-    }
-  }
-
-  // Function to fetch recent blocks
-  async function fetchRecentBlocks() {
-    try {
-      const response = await fetch(`${API_URL}/api/blocks/recent?limit=5`);
-      if (!response.ok) throw new Error('Failed to fetch blocks');
-
-      const result = await response.json();
-
-      if (result.status === 'success' && result.data) {
-        setRecentBlocks(result.data.blocks);
-      }
-    } catch (err) {
-      console.error('Error fetching blocks:', err);
-    }
-  }
-
   // Initialize and set up polling
   useEffect(() => {
     fetchTransactions();
-    fetchMetrics();
-    fetchRecentBlocks();
+    fetchSnapshot();
 
-    const metricsInterval = setInterval(fetchMetrics, 10000);
-    const transactionInterval = setInterval(fetchNewTransactions, 3000);
-    const blocksInterval = setInterval(fetchRecentBlocks, 15000);
+    // One snapshot request replaces the separate metrics, transactions and blocks polls
+    const snapshotInterval = setInterval(fetchSnapshot, 3000);
 
     return () => {
-      clearInterval(metricsInterval);
-      clearInterval(transactionInterval);
-      clearInterval(blocksInterval);
+      clearInterval(snapshotInterval);
     };
   }, []);
 
@@ -277,51 +260,44 @@ function App() {
   };
 
   const getTransactionType = (tx) => {
-    // Simple Transfer (no input data or direct transfer)
-    if (!tx.input || tx.input === '0x') return 'Transfer';
+    // Plain value transfers carry no calldata; deployments and short calldata have no selector either
+    if (!tx.selector) return tx.category === TX_CATEGORY.TRANSFER ? 'Transfer' : 'Other';
 
-    // Analyze function signatures for common operations
-    const inputData = tx.input.toLowerCase();
+    // The backend classifies calldata at ingest and only sends the selector and method name
+    const selector = tx.selector.toLowerCase();
+    const method = (tx.method || '').toLowerCase();
 
     // Mint Operations
-    if (inputData.startsWith('0x40c10f19') || // mint(address,uint256)
-      inputData.startsWith('0xa0712d68') || // mint(uint256)
-      inputData.startsWith('0x1249c58b') || // mint cToken
-      inputData.includes('mint')) {
+    if (selector === '0x40c10f19' || // mint(address,uint256)
+      selector === '0xa0712d68' || // mint(uint256)
+      selector === '0x1249c58b' || // mint cToken
+      method.includes('mint')) {
       return 'Mint';
     }
 
     // Burn Operations
-    if (inputData.startsWith('0x42966c68') || // burn(uint256)
-      inputData.startsWith('0x9dc29fac') || // burn(address,uint256)
-      inputData.includes('burn')) {
+    if (selector === '0x42966c68' || // burn(uint256)
+      selector === '0x9dc29fac' || // burn(address,uint256)
+      method.includes('burn')) {
       return 'Burn';
     }
 
     // Swap Operations (DEX related)
-    if (inputData.startsWith('0x7ff36ab5') || // swapExactTokensForTokens
-      inputData.startsWith('0x38ed1739') || // swapExactTokensForTokens
-      inputData.startsWith('0x8803dbee') || // swapTokensForExactTokens
-      inputData.startsWith('0xfb3bdb41') || // swapETHForExactTokens
-      inputData.startsWith('0x5c11d795') || // swapExactETHForTokens
-      inputData.includes('swap')) {
+    if (tx.category === TX_CATEGORY.SWAP) {
       return 'Swap';
     }
 
     // Staking Operations
-    if (inputData.startsWith('0xa694fc3a') || // stake
-      inputData.startsWith('0x2e1a7d4d') || // withdraw/unstake
-      inputData.startsWith('0x3d18b912') || // getReward
-      inputData.includes('stake') ||
-      inputData.includes('unstake') ||
-      inputData.includes('delegate')) {
+    if (selector === '0xa694fc3a' || // stake
+      selector === '0x2e1a7d4d' || // withdraw/unstake
+      selector === '0x3d18b912' || // getReward
+      method.includes('stake') ||
+      method.includes('delegate')) {
       return 'Stake';
     }
 
-    // Token transfers (ERC-20)
-    if (inputData.startsWith('0xa9059cbb') || // transfer
-      inputData.startsWith('0x23b872dd') || // transferFrom
-      inputData.startsWith('0x095ea7b3')) { // approve
+    // Token transfers and approvals (ERC-20)
+    if (tx.category === TX_CATEGORY.ERC20_TRANSFER || tx.category === TX_CATEGORY.ERC20_APPROVE) {
       return 'Transfer';
     }
 